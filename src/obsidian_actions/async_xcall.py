@@ -0,0 +1,42 @@
+"""
+Asynchronous interface with the `xcall` application.
+
+Mirrors :func:`obsidian_actions.xcall.xcall` and :func:`obsidian_actions.xcall.xcall_raw`,
+but runs `xcall` using `asyncio`, so that multiple calls can be awaited concurrently.
+"""
+import asyncio
+from asyncio.subprocess import PIPE
+
+from .xcall import _check_reply, get_url, try_json_parse, xcall_binary
+
+
+async def xcall_raw_async(app_name: str, *actions: str, **keywords: str) -> str:
+    """
+    Call an application using the `x-callback-url` protocol without blocking.
+
+    See :func:`obsidian_actions.xcall.xcall_raw` for details.
+    """
+    return (await _xcall_raw_bytes_async(app_name, *actions, **keywords)).decode()
+
+
+async def _xcall_raw_bytes_async(app_name: str, *actions: str, **keywords: str) -> bytes:
+    """Call an application without blocking, returning the undecoded reply."""
+    binary = xcall_binary()
+    url = get_url(app_name, *actions, **keywords)
+    proc = await asyncio.create_subprocess_exec(binary, "-url", url, stdout=PIPE, stderr=PIPE)
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return _check_reply(url, stdout, stderr)
+
+
+async def xcall_async(app_name: str, *actions: str, **keywords: str):
+    """
+    Call an application using the `x-callback-url` protocol without blocking.
+
+    See :func:`obsidian_actions.xcall.xcall` for details.
+    """
+    return try_json_parse(await _xcall_raw_bytes_async(app_name, *actions, **keywords))
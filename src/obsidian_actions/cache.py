@@ -0,0 +1,77 @@
+"""
+Disk cache of the notes, tags, and commands available in a vault.
+
+Listing these requires a round-trip to Obsidian each,
+which can be skipped in new python sessions by reusing the lists stored here.
+"""
+import json
+import os
+import os.path as op
+import sqlite3
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+
+
+def cache_directory() -> str:
+    """
+    Return the directory in which the vault caches are stored.
+
+    This is `$XDG_CACHE_HOME/obsidian_actions` (default: `~/.cache/obsidian_actions`).
+    """
+    base = os.environ.get("XDG_CACHE_HOME", op.expanduser("~/.cache"))
+    return op.join(base, "obsidian_actions")
+
+
+class VaultCache:
+    """
+    SQLite-backed cache of the lists of notes, tags, and commands in a single vault.
+
+    Each list is stored as JSON together with the time it was fetched.
+    Lists older than `ttl` seconds are ignored.
+    """
+
+    def __init__(self, vault_name: str, ttl: float = 3600, path: str = None):
+        """Open (or create) the cache for the vault called `vault_name`."""
+        self.ttl = ttl
+        if path is None:
+            path = op.join(cache_directory(), quote(vault_name, safe="") + ".db")
+        self.path = path
+        os.makedirs(op.dirname(op.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS lists (kind TEXT PRIMARY KEY, value TEXT, fetched_at REAL)")
+
+    @contextmanager
+    def _connect(self, ):
+        """Open a connection to the database and commit any changes on exit."""
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self, kind: str):
+        """
+        Load the list of `kind` ("notes", "tags", or "commands") from the cache.
+
+        Returns None if the list is not in the cache or is older than `ttl`.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, fetched_at FROM lists WHERE kind = ?", (kind, )).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def store(self, kind: str, value):
+        """Store the list of `kind` ("notes", "tags", or "commands") in the cache."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO lists (kind, value, fetched_at) VALUES (?, ?, ?)",
+                (kind, json.dumps(value), time.time()),
+            )
+
+    def clear(self, ):
+        """Remove all lists from the cache."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM lists")
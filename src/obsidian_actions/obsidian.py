@@ -5,10 +5,25 @@ For this to work you will have to have the plugin installed in Obsidian
 and have `xcall.app` installed.
 """
 
-from collections import UserDict
+import asyncio
+import time
+from collections import OrderedDict, UserDict
+from concurrent.futures import Future, wait
+from contextlib import contextmanager
+from copy import deepcopy
+from datetime import date
+from threading import Thread
 from typing import Collection, Union
+from urllib.parse import quote
+from weakref import WeakValueDictionary
 
-from .xcall import xcall
+from .async_xcall import xcall_async
+from .cache import VaultCache
+from .xcall import XCallPool, build_query
+
+# translation tables from tag names/command IDs to python attribute names
+_TAG_ATTRIBUTE_TABLE = str.maketrans({"-": "_", "/": "__"})
+_COMMAND_ATTRIBUTE_TABLE = str.maketrans({":": "_", "-": "_"})
 
 
 class Vault:
@@ -20,13 +35,118 @@ class Vault:
     Actions are available as methods of the `Vault` class.
     """
 
-    def __init__(self, name) -> None:
-        """Prepare to run actions in Obsidian vault with the given `name`."""
+    _list_actions = {
+        "commands": ("command", "list"),
+        "tags": ("tags", "list"),
+        "notes": ("note", "list"),
+    }
+
+    _read_only_actions = {
+        ("command", "list"),
+        ("tags", "list"),
+        ("note", "list"),
+        ("file", "list"),
+        ("folder", "list"),
+        ("info", ),
+        ("dataview", "list-query"),
+        ("dataview", "table-query"),
+    }
+
+    def __init__(self, name, cache_ttl=None, reply_cache_ttl=None, reply_cache_size=128, max_processes=4) -> None:
+        """
+        Prepare to run actions in Obsidian vault with the given `name`.
+
+        Up to `max_processes` actions are run concurrently (e.g., within a :meth:`batch`).
+
+        If `cache_ttl` is set, the lists of commands, tags, and notes are stored on disk
+        and reused for up to `cache_ttl` seconds (see :class:`VaultCache`).
+
+        If `reply_cache_ttl` is set, the replies to the last `reply_cache_size` read-only actions
+        (listings, Dataview queries, and `info`) are kept in memory and reused for up to `reply_cache_ttl` seconds.
+        """
         self.name = name
+        self._url_prefix = "obsidian://actions-uri/"
+        self._vault_query = build_query({"vault": name})
+        self._pending = None
+        self._pool = XCallPool(size=max_processes)
+        self._note_registry = WeakValueDictionary()
+        self.cache = None if cache_ttl is None else VaultCache(name, ttl=cache_ttl)
+        self.reply_cache_ttl = reply_cache_ttl
+        self.reply_cache_size = reply_cache_size
+        self._reply_cache = OrderedDict()
+        self._periodic_notes = {}
+        self._set_collections()
+
+    def _set_collections(self, ):
+        """Set up the commands, tags, and notes, which are only listed on first use."""
         self.commands = Commands(self)
         self.tags = Tags(self)
         self.notes = Notes(self)
 
+    def _list(self, kind):
+        """
+        Return the list of all `kind` ("commands", "tags", or "notes") in the vault.
+
+        The list is taken from the disk cache if available.
+        This bypasses any open :meth:`batch`, as the list is needed immediately.
+        """
+        value = None if self.cache is None else self.cache.load(kind)
+        if value is None:
+            value = self._run(self._list_actions[kind], {})
+            if self.cache is not None:
+                self.cache.store(kind, value)
+        return value
+
+    def prefetch(self, ):
+        """
+        List the commands, tags, and notes concurrently.
+
+        Otherwise, each of these is listed separately when first used.
+        Lists in the disk cache (if any) are reused.
+        """
+        lists = {kind: None if self.cache is None else self.cache.load(kind) for kind in self._list_actions}
+        futures = {
+            kind: self._submit(self._list_actions[kind], {})
+            for kind, value in lists.items() if value is None
+        }
+        for kind, future in futures.items():
+            lists[kind] = future.result()
+            if self.cache is not None:
+                self.cache.store(kind, lists[kind])
+        self.commands = Commands(self, lists["commands"])
+        self.tags = Tags(self, lists["tags"])
+        self.notes = Notes(self, lists["notes"])
+
+    def refresh_cache(self, background=False):
+        """
+        Reload the commands, tags, and notes from Obsidian.
+
+        The disk cache (if any) is cleared and the lists are fetched again on first use.
+        If `background` is True, the lists are fetched straight away in a separate thread.
+        """
+        if self.cache is not None:
+            self.cache.clear()
+        self._set_collections()
+        if background:
+            Thread(target=self.prefetch, daemon=True).start()
+
+    def _modified(self, *paths):
+        """
+        Invalidate the disk cache and in-memory caches after the vault has been modified.
+
+        Any loaded attributes of notes at the given file or folder `paths` are dropped as well.
+        """
+        if self.cache is not None:
+            self.cache.clear()
+        self._reply_cache.clear()
+        self._periodic_notes.clear()
+        for path in paths:
+            name = path.removesuffix(".md")
+            folder = path.rstrip("/") + "/"
+            for note_name, note in list(self._note_registry.items()):
+                if note_name == name or note_name.startswith(folder):
+                    note._reply = None
+
     def __call__(self, *actions, **kwargs):
         """
         Run one of the Action URIs.
@@ -34,13 +154,123 @@ class Vault:
         For a list of the available ones see https://zottmann.dev/obsidian-actions-uri/routes/.
         You do not have to include the vault name or "actions-uri" when calling this method.
         Some of the actions are available as direct method calls on this class.
+
+        Within a :meth:`batch` the action is queued and a `Future` is returned instead.
+        """
+        use_kwargs = self._use_kwargs(kwargs)
+        if self._pending is not None:
+            future = Future()
+            self._pending.append((actions, use_kwargs, future))
+            return future
+        return self._run(actions, use_kwargs)
+
+    def submit_async(self, *actions, **kwargs) -> Future:
+        """
+        Submit one of the Action URIs without waiting for the reply.
+
+        Returns a `concurrent.futures.Future`, which will contain the reply.
+        Submitted actions run concurrently, so they might be completed out of order.
+        """
+        return self._submit(actions, self._use_kwargs(kwargs))
+
+    def _use_kwargs(self, kwargs):
+        """Remove any keywords set to None."""
+        if None in kwargs.values():
+            return {k: v for k, v in kwargs.items() if v is not None}
+        return kwargs
+
+    def _submit(self, actions, use_kwargs, future=None) -> Future:
+        """Submit a single action, setting the unwrapped reply on `future`."""
+        if future is None:
+            future = Future()
+
+        def set_reply(submitted):
+            try:
+                future.set_result(self._unwrap(submitted.result()))
+            except Exception as e:
+                future.set_exception(e)
+
+        submitted = self._pool.submit(self._url(actions, use_kwargs))
+        submitted.add_done_callback(set_reply)
+        return future
+
+    def _url(self, actions, use_kwargs):
+        """
+        Build the URL to run an action in this vault.
+
+        The URL prefix and vault name are only quoted once, when the vault is created.
+        """
+        url = self._url_prefix + "/".join([quote(a) for a in actions]) + "?" + self._vault_query
+        if len(use_kwargs) == 0:
+            return url
+        return url + "&" + build_query(use_kwargs)
+
+    def _run(self, actions, use_kwargs):
+        """
+        Run a single action and unwrap the reply, reusing recent replies to read-only actions.
+
+        Cached replies are stored and returned as copies, so that callers can freely modify them.
         """
-        use_kwargs = {k: v for k, v in kwargs.items() if v is not None}
-        result = xcall("obsidian", "actions-uri", *actions, vault=self.name, **use_kwargs)
+        if self.reply_cache_ttl is None or actions not in self._read_only_actions:
+            return self._submit(actions, use_kwargs).result()
+        key = (actions, frozenset(use_kwargs.items()))
+        now = time.monotonic()
+        cached = self._reply_cache.get(key)
+        if cached is not None and now - cached[0] < self.reply_cache_ttl:
+            self._reply_cache.move_to_end(key)
+            return deepcopy(cached[1])
+        result = self._submit(actions, use_kwargs).result()
+        self._reply_cache[key] = (now, deepcopy(result))
+        self._reply_cache.move_to_end(key)
+        while len(self._reply_cache) > self.reply_cache_size:
+            self._reply_cache.popitem(last=False)
+        return result
+
+    async def _run_async(self, actions, use_kwargs):
+        """Run a single action without blocking and unwrap the reply."""
+        return self._unwrap(await xcall_async(self._url(actions, use_kwargs)))
+
+    def _unwrap(self, result):
+        """Unwrap single values and remove the "result-" prefix from the reply."""
         if len(result) == 1:
-            return list(result.values())[0]
+            return next(iter(result.values()))
+        # the plugin prefixes either all or none of the keys, so only the first key needs checking
+        if not next(iter(result), "").startswith("result-"):
+            return result
         return {k.removeprefix("result-"): v for k, v in result.items()}
 
+    @contextmanager
+    def batch(self, ):
+        """
+        Queue all actions called within the context and run them concurrently on exit.
+
+        Within the context each action returns a `concurrent.futures.Future`,
+        which will contain the reply once the context exits.
+        The context itself provides a list, which is filled with all replies in order on exit.
+        If any of the actions failed, the first error is raised after all actions have run.
+
+        Only methods that return the reply unchanged can be used within a batch
+        (e.g., not :meth:`search` or :meth:`note_create`).
+        """
+        if self._pending is not None:
+            raise RuntimeError("Cannot start a new batch while another batch is still open.")
+        pending = self._pending = []
+        results = []
+        try:
+            yield results
+        except BaseException:
+            for _, _, future in pending:
+                future.cancel()
+            raise
+        finally:
+            self._pending = None
+
+        for actions, use_kwargs, future in pending:
+            self._submit(actions, use_kwargs, future)
+        futures = [future for _, _, future in pending]
+        wait(futures)
+        results.extend(future.result() for future in futures)
+
     def dataview_query(self, *sources, combine="and", fields=None):
         """
         Create a Dataview query.
@@ -84,60 +314,47 @@ class Vault:
             result = self("search", "all-notes", query=query)
             return Notes(self, result)
 
+    def _periodic_note(self, period, command):
+        """
+        Get the current periodic note, creating it with `command` if needed.
+
+        The note found is reused for the rest of the day, unless the vault is modified in the meantime.
+        """
+        today = date.today()
+        cached = self._periodic_notes.get(period)
+        if cached is not None and cached[0] == today:
+            name = cached[1]
+        else:
+            try:
+                name = self(period + "-note", "get-current", silent=True)["filepath"]
+            except ChildProcessError as e:
+                if "Note couldn't be found" not in e.args[0]:
+                    raise
+                getattr(self.commands, command)()
+                self._modified()
+                name = self(period + "-note", "get-current", silent=True)["filepath"]
+            self._periodic_notes[period] = (today, name)
+        return Note(self, name, filepath=name)
+
     def daily_note(self, ):
         """Get today's daily note."""
-        try:
-            name = self("daily-note", "get-current", silent=True)["filepath"]
-        except ChildProcessError as e:
-            if "Note couldn't be found" not in e.args[0]:
-                raise
-            self.commands.daily_notes()
-            name = self("daily-note", "get-current", silent=True)["filepath"]
-        return Note(self, name)
+        return self._periodic_note("daily", "daily_notes")
 
     def weekly_note(self, ):
         """Get weekly note."""
-        try:
-            name = self("weekly-note", "get-current", silent=True)["filepath"]
-        except ChildProcessError as e:
-            if "Note couldn't be found" not in e.args[0]:
-                raise
-            self.commands.periodic_notes_open_weekly_note()
-            name = self("weekly-note", "get-current", silent=True)["filepath"]
-        return Note(self, name)
+        return self._periodic_note("weekly", "periodic_notes_open_weekly_note")
 
     def monthly_note(self, ):
         """Get monthly note."""
-        try:
-            name = self("monthly-note", "get-current", silent=True)["filepath"]
-        except ChildProcessError as e:
-            if "Note couldn't be found" not in e.args[0]:
-                raise
-            self.commands.periodic_notes_open_monthly_note()
-            name = self("monthly-note", "get-current", silent=True)["filepath"]
-        return Note(self, name)
+        return self._periodic_note("monthly", "periodic_notes_open_monthly_note")
 
     def quarterly_note(self, ):
         """Get quarterly note."""
-        try:
-            name = self("quarterly-note", "get-current", silent=True)["filepath"]
-        except ChildProcessError as e:
-            if "Note couldn't be found" not in e.args[0]:
-                raise
-            self.commands.periodic_notes_open_quarterly_note()
-            name = self("quarterly-note", "get-current", silent=True)["filepath"]
-        return Note(self, name)
+        return self._periodic_note("quarterly", "periodic_notes_open_quarterly_note")
 
     def yearly_note(self, ):
         """Get yearly note."""
-        try:
-            name = self("yearly-note", "get-current", silent=True)["filepath"]
-        except ChildProcessError as e:
-            if "Note couldn't be found" not in e.args[0]:
-                raise
-            self.commands.periodic_notes_open_yearly_note()
-            name = self("yearly-note", "get-current", silent=True)["filepath"]
-        return Note(self, name)
+        return self._periodic_note("yearly", "periodic_notes_open_yearly_note")
 
     def file_list(self, ):
         """List all files (not just notes) in the vault."""
@@ -158,15 +375,21 @@ class Vault:
         By default the new file will be opened in Obsidian.
         Set `silent=True` to disable this.
         """
-        return self("file", "rename", file=old_filename, new_filename=new_filename, silent=silent)
+        result = self("file", "rename", file=old_filename, new_filename=new_filename, silent=silent)
+        self._modified(old_filename, new_filename)
+        return result
 
     def file_delete(self, filename):
         """Delete specific file."""
-        return self("file", "delete", file=filename)
+        result = self("file", "delete", file=filename)
+        self._modified(filename)
+        return result
 
     def file_trash(self, filename):
         """Trash specific file."""
-        return self("file", "trash", file=filename)
+        result = self("file", "trash", file=filename)
+        self._modified(filename)
+        return result
 
     def folder_list(self, ):
         """List folder paths."""
@@ -178,7 +401,9 @@ class Vault:
 
         Folder path needs to be relative to top-level vault directory.
         """
-        return self("folder", "create", folder=folder)
+        result = self("folder", "create", folder=folder)
+        self._modified()
+        return result
 
     def folder_rename(self, old_folder: str, new_folder: str):
         """
@@ -186,7 +411,9 @@ class Vault:
 
         Folder paths needs to be relative to top-level vault directory.
         """
-        return self("folder", "create", folder=old_folder, new_foldername=new_folder)
+        result = self("folder", "rename", folder=old_folder, new_foldername=new_folder)
+        self._modified(old_folder, new_folder)
+        return result
 
     def folder_delete(self, folder: str):
         """
@@ -194,7 +421,9 @@ class Vault:
 
         Folder path needs to be relative to top-level vault directory.
         """
-        return self("folder", "delete", folder=folder)
+        result = self("folder", "delete", folder=folder)
+        self._modified(folder)
+        return result
 
     def folder_trash(self, folder: str):
         """
@@ -202,7 +431,9 @@ class Vault:
 
         Folder path needs to be relative to top-level vault directory.
         """
-        return self("folder", "trash", folder=folder)
+        result = self("folder", "trash", folder=folder)
+        self._modified(folder)
+        return result
 
     def info(self, ):
         """Return information about plugin and Obsidian."""
@@ -212,7 +443,7 @@ class Vault:
     def active_note(self, ) -> "Note":
         """Get the currently active note."""
         as_dict = self("note", "get-active")
-        return Note(self, as_dict["filepath"])
+        return Note(self, as_dict["filepath"], filepath=as_dict["filepath"])
 
     def note_create(self, filename, content=None, template=None, overwrite=False, silent=False) -> "Note":
         """
@@ -226,45 +457,320 @@ class Vault:
 
         Note content will be returned parsed into the note `body`, `content`, `filepath`, `front-matter`, `properties`.
         """
+        reply = self("note", "create", **self._note_create_kwargs(filename, content, template, overwrite, silent))
+        self._modified()
+        return self._created_note(filename, reply)
+
+    def _created_note(self, filename, reply) -> "Note":
+        """Return the note at `filename`, with its attributes set from the `note create` reply."""
+        note = Note(self, filename, filepath=reply["filepath"])
+        note._reply = reply
+        return note
+
+    def _note_create_kwargs(self, filename, content, template, overwrite, silent):
+        """Return the keywords for the `note create` action (see :meth:`note_create`)."""
         if content is not None and template is not None:
             raise ValueError("Both `content` and `template` have been set when creating note. Please only set a signle one.")
-        apply = "content" if template is None else "template"
-        if template is None and content is None:
-            content = ""
-        self(
-            "note", "create",
-            file=filename, apply=apply,
-            content=content, template=template,
+        if template is None:
+            source = {"apply": "content", "content": "" if content is None else content}
+        else:
+            source = {"apply": "template", "template": template}
+        return dict(
+            file=filename, **source,
             if_exists="overwrite" if overwrite else "skip",
             silent=silent
         )
-        return Note(self, filename)
+
+
+class AsyncVault:
+    """
+    Represents an Obsidian vault, where actions are run asynchronously.
+
+    Every action returns a coroutine, so that many actions can be awaited concurrently
+    (e.g., using :meth:`gather`).
+    All state (e.g., the `commands`, `tags`, `notes`, and caches) is kept by the synchronous :attr:`sync` vault.
+    Any notes or queries returned are bound to that vault as well.
+    """
+
+    def __init__(self, name, **kwargs) -> None:
+        """
+        Prepare to asynchronously run actions in Obsidian vault with the given `name`.
+
+        Any keyword arguments are passed on to the synchronous :class:`Vault`.
+        """
+        self.sync = Vault(name, **kwargs)
+
+    @property
+    def name(self, ) -> str:
+        """Name of the vault."""
+        return self.sync.name
+
+    @property
+    def commands(self, ) -> "Commands":
+        """Commands available in the vault, listed on first use."""
+        return self.sync.commands
+
+    @property
+    def tags(self, ) -> "Tags":
+        """Tags used in the vault, listed on first use."""
+        return self.sync.tags
+
+    @property
+    def notes(self, ) -> "Notes":
+        """Notes in the vault, listed on first use."""
+        return self.sync.notes
+
+    async def prefetch(self, ):
+        """
+        List the commands, tags, and notes concurrently.
+
+        Otherwise, each of these is listed separately (and synchronously) when first used.
+        """
+        commands, tags, notes = await asyncio.gather(
+            *[self(*Vault._list_actions[kind]) for kind in ("commands", "tags", "notes")]
+        )
+        sync = self.sync
+        sync.commands = Commands(sync, commands)
+        sync.tags = Tags(sync, tags)
+        sync.notes = Notes(sync, notes)
+
+    def refresh_cache(self, background=False):
+        """
+        Reload the commands, tags, and notes from Obsidian.
+
+        See :meth:`Vault.refresh_cache` for details.
+        """
+        self.sync.refresh_cache(background=background)
+
+    async def __call__(self, *actions, **kwargs):
+        """
+        Run one of the Action URIs without blocking.
+
+        See :meth:`Vault.__call__` for details.
+        """
+        sync = self.sync
+        return await sync._run_async(actions, sync._use_kwargs(kwargs))
+
+    def submit_async(self, *actions, **kwargs) -> asyncio.Task:
+        """
+        Submit one of the Action URIs without waiting for the reply.
+
+        Returns an `asyncio.Task`, which will contain the reply.
+        Must be called while the event loop is running.
+        """
+        return asyncio.ensure_future(self(*actions, **kwargs))
+
+    async def gather(self, *coros, limit=8):
+        """
+        Await all of the `coros` concurrently, returning their results in order.
+
+        At most `limit` of the coroutines will be running at the same time.
+        """
+        semaphore = asyncio.Semaphore(limit)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*[bounded(coro) for coro in coros])
+
+    def dataview_query(self, *sources, combine="and", fields=None):
+        """
+        Create a Dataview query.
+
+        The query is run synchronously. See :meth:`Vault.dataview_query` for details.
+        """
+        return self.sync.dataview_query(*sources, combine=combine, fields=fields)
+
+    async def search(self, query, open=False) -> "Notes":
+        """
+        Run a search over all notes.
+
+        If `open` the search will be opened within Obsidian.
+        Otherwise, the results are returned as `notes`.
+        """
+        if open:
+            return await self("search", "open", query=query)
+        result = await self("search", "all-notes", query=query)
+        return Notes(self.sync, result)
+
+    async def _periodic_note(self, period, command):
+        """Get the current periodic note, creating it with `command` if needed."""
+        try:
+            name = (await self(period + "-note", "get-current", silent=True))["filepath"]
+        except ChildProcessError as e:
+            if "Note couldn't be found" not in e.args[0]:
+                raise
+            await self._modifying((), "command", "execute", commands=getattr(self.commands, command).id)
+            name = (await self(period + "-note", "get-current", silent=True))["filepath"]
+        return Note(self.sync, name, filepath=name)
+
+    async def daily_note(self, ):
+        """Get today's daily note."""
+        return await self._periodic_note("daily", "daily_notes")
+
+    async def weekly_note(self, ):
+        """Get weekly note."""
+        return await self._periodic_note("weekly", "periodic_notes_open_weekly_note")
+
+    async def monthly_note(self, ):
+        """Get monthly note."""
+        return await self._periodic_note("monthly", "periodic_notes_open_monthly_note")
+
+    async def quarterly_note(self, ):
+        """Get quarterly note."""
+        return await self._periodic_note("quarterly", "periodic_notes_open_quarterly_note")
+
+    async def yearly_note(self, ):
+        """Get yearly note."""
+        return await self._periodic_note("yearly", "periodic_notes_open_yearly_note")
+
+    async def file_list(self, ):
+        """List all files (not just notes) in the vault."""
+        return await self("file", "list")
+
+    async def file_get_active(self, ):
+        """Return the currently active file."""
+        return await self("file", "get-active")
+
+    async def file_open(self, filename):
+        """Open file in Obsidian."""
+        return await self("file", "open", file=filename)
+
+    async def _modifying(self, paths, *actions, **kwargs):
+        """
+        Run an action that modifies the vault, invalidating the caches once it has finished.
+
+        Loaded attributes of notes at the file or folder `paths` are dropped (see :meth:`Vault._modified`).
+        """
+        try:
+            return await self(*actions, **kwargs)
+        finally:
+            self.sync._modified(*paths)
+
+    async def file_rename(self, old_filename, new_filename, silent=False):
+        """
+        Rename `old_filename` to `new_filename`.
+
+        See :meth:`Vault.file_rename` for details.
+        """
+        return await self._modifying(
+            (old_filename, new_filename), "file", "rename", file=old_filename, new_filename=new_filename, silent=silent
+        )
+
+    async def file_delete(self, filename):
+        """Delete specific file."""
+        return await self._modifying((filename, ), "file", "delete", file=filename)
+
+    async def file_trash(self, filename):
+        """Trash specific file."""
+        return await self._modifying((filename, ), "file", "trash", file=filename)
+
+    async def folder_list(self, ):
+        """List folder paths."""
+        return await self("folder", "list")
+
+    async def folder_create(self, folder: str):
+        """Create folder relative to top-level vault directory."""
+        return await self._modifying((), "folder", "create", folder=folder)
+
+    async def folder_rename(self, old_folder: str, new_folder: str):
+        """Rename folder path relative to top-level vault directory."""
+        return await self._modifying((old_folder, new_folder), "folder", "rename", folder=old_folder, new_foldername=new_folder)
+
+    async def folder_delete(self, folder: str):
+        """Delete folder relative to top-level vault directory."""
+        return await self._modifying((folder, ), "folder", "delete", folder=folder)
+
+    async def folder_trash(self, folder: str):
+        """Trash folder relative to top-level vault directory."""
+        return await self._modifying((folder, ), "folder", "trash", folder=folder)
+
+    async def info(self, ):
+        """Return information about plugin and Obsidian."""
+        return await self("info")
+
+    @property
+    async def active_note(self, ) -> "Note":
+        """Get the currently active note."""
+        as_dict = await self("note", "get-active")
+        return Note(self.sync, as_dict["filepath"], filepath=as_dict["filepath"])
+
+    async def note_get(self, filename) -> "Note":
+        """Get the note at `filename` with all its attributes loaded."""
+        note = Note(self.sync, filename)
+        note._reply = await self("note", "get", file=filename)
+        return note
+
+    async def load_notes(self, notes: Collection["Note"], limit=16) -> Collection["Note"]:
+        """
+        Load the attributes of all `notes` concurrently.
+
+        At most `limit` notes are loaded at the same time.
+        Returns the same `notes`.
+        """
+        async def load(note):
+            note._reply = await self("note", "get", file=note._file)
+
+        await self.gather(*[load(note) for note in notes], limit=limit)
+        return notes
+
+    async def note_create(self, filename, content=None, template=None, overwrite=False, silent=False) -> "Note":
+        """
+        Create a note at `filename` in Obsidian.
+
+        See :meth:`Vault.note_create` for details.
+        """
+        kwargs = self.sync._note_create_kwargs(filename, content, template, overwrite, silent)
+        reply = await self._modifying((), "note", "create", **kwargs)
+        return self.sync._created_note(filename, reply)
 
 
 class Tags:
     """All tabs being used in the vault."""
 
     def __init__(self, vault: Vault, tags: Collection[Union[str, "Tag"]]=None):
-        """Create new `Tags` for given `vault`."""
+        """
+        Create new `Tags` for given `vault`.
+
+        If no `tags` are provided, they will be listed from Obsidian on first use.
+        """
         self.vault = vault
-        if tags is None:
-            tags = self.vault("tags", "list")
-        self.list = [tag if isinstance(tag, Tag) else Tag(tag) for tag in tags]
+        self._list = None
+        self._attributes = None
+        if tags is not None:
+            self._set_tags(tags)
+
+    def _set_tags(self, tags):
+        """Store the tags and index them by attribute name."""
+        self._list = [tag if isinstance(tag, Tag) else Tag(tag) for tag in tags]
+        self._attributes = {tag.attribute_key: tag for tag in self._list}
+
+    def _ensure_populated(self, ):
+        """List the tags from Obsidian if this has not been done yet."""
+        if self._list is None:
+            self._set_tags(self.vault._list("tags"))
 
     @property
-    def _attributes(self, ):
-        """Return tags as dictionary."""
-        return {tag.attribute_key: tag for tag in self.list}
+    def list(self, ):
+        """List of all tags."""
+        self._ensure_populated()
+        return self._list
 
     def __dir__(self, ):
         """Allow tags to ge accessed using autocomplete."""
+        self._ensure_populated()
         return ["list", "update"] + list(self._attributes.keys())
 
     def __getattr__(self, name: str):
         """Get a specific tag."""
-        if name in self._attributes.keys():
-            return self._attributes[name]
-        raise AttributeError(f"Tag with name {name} is not used in this vault.")
+        if name.startswith("__"):
+            raise AttributeError(name)
+        self._ensure_populated()
+        tag = self._attributes.get(name)
+        if tag is None:
+            raise AttributeError(f"Tag with name {name} is not used in this vault.")
+        return tag
 
     def __repr__(self, ):
         """Return result of `repr(tags)`."""
@@ -278,96 +784,247 @@ class Tags:
 class Tag:
     """Represents a tag used in the vault."""
 
+    __slots__ = ("name", "attribute_key")
+
     def __init__(self, name: str):
-        """Create a new tag with given `name`."""
-        self.name = name.removeprefix("#")
+        """
+        Create a new tag with given `name`.
 
-    @property
-    def attribute_key(self, ):
-        """Key that can be used as attribute in python."""
-        return self.name.replace("-", "_").replace("/", "__")
+        The `attribute_key` is the key that can be used as attribute in python.
+        """
+        self.name = name.removeprefix("#")
+        self.attribute_key = self.name.translate(_TAG_ATTRIBUTE_TABLE)
 
     def __repr__(self, ):
         """Return string representation of tag."""
         return "#" + self.name
 
 class Notes(UserDict):
-    """Collection of notes in the vault."""
+    """
+    Collection of notes in the vault.
+
+    Only the note names are stored.
+    The `Note` objects are created when first requested and then kept,
+    so that any attributes loaded are reused by later lookups.
+    """
 
     def __init__(self, vault: Vault, notes: Collection[Union[str, "Note"]]=None):
-        """Create a new set of notes from the `vault`."""
+        """
+        Create a new set of notes from the `vault`.
+
+        If no `notes` are provided, they will be listed from Obsidian on first use.
+        """
         self.vault = vault
-        if notes is None:
-            notes = self.vault("note", "list")
-        as_list = [note if isinstance(note, Note) else Note(vault, note) for note in notes]
-        self.data = {note.name: note for note in as_list}
+        self._names = None
+        self._notes = {}
+        if notes is not None:
+            self._set_notes(notes)
+
+    def _set_notes(self, notes):
+        """Store the note names."""
+        self._names = {}
+        for note in notes:
+            if isinstance(note, Note):
+                self._notes[note.name] = note
+                self._names[note.name] = None
+            else:
+                self._names[note.removesuffix(".md")] = None
+
+    def _ensure_populated(self, ):
+        """List the notes from Obsidian if this has not been done yet."""
+        if self._names is None:
+            self._set_notes(self.vault._list("notes"))
+
+    @property
+    def data(self, ):
+        """Dictionary of all notes by name."""
+        return {name: self[name] for name in self}
+
+    def copy(self, ):
+        """Return a copy of the collection, sharing the same `Note` objects."""
+        new = Notes(self.vault)
+        if self._names is not None:
+            new._names = dict(self._names)
+            new._notes = dict(self._notes)
+        return new
+
+    __copy__ = copy
+
+    def __len__(self, ):
+        """Return number of notes."""
+        self._ensure_populated()
+        return len(self._names)
+
+    def __iter__(self, ):
+        """Iterate over the note names."""
+        self._ensure_populated()
+        return iter(self._names)
+
+    def __contains__(self, name):
+        """Check whether there is a note called `name`."""
+        self._ensure_populated()
+        return name in self._names
+
+    def __getitem__(self, name: str) -> "Note":
+        """
+        Get the note called `name`.
+
+        If the notes have not been listed yet, the note is returned without checking whether it exists.
+        """
+        if self._names is not None and name not in self._names:
+            raise KeyError(name)
+        return self._get_note(name)
+
+    def _get_note(self, name: str) -> "Note":
+        """Get the note called `name` without checking whether it is in the collection."""
+        note = self._notes.get(name)
+        if note is None:
+            note = self._notes[name] = Note(self.vault, name)
+        return note
+
+    def get(self, name: str, default=None):
+        """Get the note called `name` or `default` if there is no such note."""
+        self._ensure_populated()
+        if name not in self._names:
+            return default
+        return self._get_note(name)
+
+    def load(self, ) -> list:
+        """
+        Load the attributes of all notes together in a single batch.
+
+        Returns a list with the loaded notes.
+        """
+        self._ensure_populated()
+        notes = [self._get_note(name) for name in self._names]
+        with self.vault.batch():
+            for note in notes:
+                note.load()
+        return notes
+
+    def __setitem__(self, name: str, note: "Note"):
+        """Add `note` to the collection as `name`."""
+        self._ensure_populated()
+        self._names[name] = None
+        self._notes[name] = note
+
+    def __delitem__(self, name: str):
+        """Remove the note called `name` from the collection."""
+        self._ensure_populated()
+        del self._names[name]
+        self._notes.pop(name, None)
 
     def __repr__(self, ):
-        """Return string representation of notes."""
-        return repr(set(self.data.keys()))
+        """
+        Return short summary of the notes.
+
+        The notes are not listed from Obsidian for this.
+        Use `str(notes)` to get all the note names.
+        """
+        if self._names is None:
+            return "Notes(not listed yet)"
+        return f"Notes({len(self._names)} notes)"
 
     def __str__(self, ):
         """Return string representation of notes."""
-        return str(set(self.data.keys()))
+        return str(set(self))
 
 
 class Note:
     """Representation of a note within Obsidian."""
 
-    def __init__(self, vault: Vault, name: str):
+    __slots__ = ("vault", "name", "_filepath", "_reply", "__weakref__")
+
+    def __new__(cls, vault: Vault, name: str, filepath: str = None):
         """
         Create a new note.
 
         Attributes will be lazily loaded.
+        Set `filepath` if it is already known to avoid loading it.
+
+        If a note with the same name is still in use in the `vault`, that note is returned instead,
+        so that any loaded attributes are shared.
         """
-        self.vault = vault
-        self.name = name.removesuffix(".md")
-
-    def _load_attributes(self, ):
-        """Load the note and fill out any attributes."""
-        if hasattr(self, "_content"):
-            return
-        reply_get = self.vault("note", "get", file=self.name)
-
-        for param in [
-            "filepath",
-            "front-matter",
-            "content",
-            "properties",
-            "body",
-        ]:
-            attr = "_" + param.replace("-", "_")
-            setattr(self, attr, reply_get[param])
+        name = name.removesuffix(".md")
+        note = vault._note_registry.get(name)
+        if note is None:
+            note = super().__new__(cls)
+            note.vault = vault
+            note.name = name
+            note._filepath = filepath
+            note._reply = None
+            vault._note_registry[name] = note
+        elif note._filepath is None:
+            note._filepath = filepath
+        return note
+
+    def _modified(self, ):
+        """Drop the loaded attributes after the note has been modified."""
+        self._reply = None
+        self.vault._modified()
+
+    def load(self, ):
+        """
+        Load all the note attributes from Obsidian.
+
+        This happens automatically when any of the attributes is first accessed.
+        Within a :meth:`Vault.batch` the loading is queued,
+        so that many notes can be loaded together (see :meth:`Notes.load`).
+        """
+        self._reply = self.vault("note", "get", file=self._file)
+
+    def _load_reply(self, ) -> dict:
+        """Return the reply to the `note get` action, which is shared by all attributes."""
+        if self._reply is None or (isinstance(self._reply, Future) and self._reply.cancelled()):
+            # a cancelled load (e.g., from an aborted batch) never ran, so load again
+            self.load()
+        if isinstance(self._reply, Future):
+            if not self._reply.done() and self.vault._pending is not None:
+                raise RuntimeError(f"Attributes of {self} are not available until the batch is finished.")
+            try:
+                self._reply = self._reply.result()
+            except BaseException:
+                # allow a retry on the next access, like a failed load outside of a batch
+                self._reply = None
+                raise
+        return self._reply
 
     @property
     def filepath(self, ) -> str:
         """Return file path of note relative to vault root folder."""
-        self._load_attributes()
+        if self._filepath is None:
+            self._filepath = self._load_reply()["filepath"]
         return self._filepath
 
+    @property
+    def _file(self, ) -> str:
+        """
+        Return the file path if known or the note name otherwise.
+
+        Obsidian accepts either to identify the note,
+        so this avoids a round-trip to look up the file path.
+        """
+        return self.name if self._filepath is None else self._filepath
+
     @property
     def content(self, ) -> str:
         """Return entire content of note."""
-        self._load_attributes()
-        return self._content
+        return self._load_reply()["content"]
 
     @property
     def body(self, ) -> str:
         """Return body of note excluding front matter."""
-        self._load_attributes()
-        return self._body
+        return self._load_reply()["body"]
 
     @property
     def front_matter(self, ) -> str:
         """Return front matter of the note."""
-        self._load_attributes()
-        return self._front_matter
+        return self._load_reply()["front-matter"]
 
     @property
     def properties(self, ) -> dict:
         """Return properties of the note embedded in front matter."""
-        self._load_attributes()
-        return self._properties
+        return self._load_reply()["properties"]
 
     def incoming(self, ) -> Notes:
         """Return notes that link to this note."""
@@ -395,14 +1052,16 @@ class Note:
         If `below_headline` is set, append below that headline instead.
         `below_headline` should contain the full exact line of how the headline appears in the note.
         """
-        return self.vault(
+        result = self.vault(
             "note", "append",
-            file=self.filepath, content=content,
+            file=self._file, content=content,
             below_headline=below_headline,
             create_if_not_found=create_if_not_found,
             ensure_newline=ensure_newline,
             silent=silent
         )
+        self._modified()
+        return result
 
     def prepend(self, content, below_headline=None, create_if_not_found=False, ensure_newline=False, silent=False):
         """
@@ -411,23 +1070,27 @@ class Note:
         By default the `content` is placed just after the front matter.
         For more details see :meth:`note_append`.
         """
-        return self.vault(
+        result = self.vault(
             "note", "prepend",
-            file=self.filepath, content=content,
+            file=self._file, content=content,
             below_headline=below_headline,
             create_if_not_found=create_if_not_found,
             ensure_newline=ensure_newline,
             silent=silent
         )
+        self._modified()
+        return result
 
     def open(self, ):
         """Open this note in Obsidian."""
-        return self("note", "open", file=self.filepath)
+        return self.vault("note", "open", file=self._file)
 
     def replace(self, search: str, replace: str, silent=False, regex=False):
         """Replace text `search` with text `replace` within this note."""
         cmd = "search-regex-and-replace" if regex else "search-string-and-replace"
-        return self("note", cmd, file=self.filepath, search=search, replace=replace, silent=silent)
+        result = self.vault("note", cmd, file=self._file, search=search, replace=replace, silent=silent)
+        self._modified()
+        return result
 
     def delete(self, trash=False):
         """
@@ -435,7 +1098,9 @@ class Note:
 
         Trash the note instead if `trash` is set to True.
         """
-        return self("note", "trash" if trash else "delete", file=self.filepath)
+        result = self.vault("note", "trash" if trash else "delete", file=self._file)
+        self._modified()
+        return result
 
     def __repr__(self, ):
         """Represent note with its name."""
@@ -448,31 +1113,122 @@ class Commands(UserDict):
 
     Each command is available using its ID.
     Commands are also available as attributes.
+    Only the command IDs and names are stored.
+    The `Command` objects are created when requested and kept for as long as they are in use.
     """
 
-    def __init__(self, vault: Vault):
-        """Create a new set of commands available in the `vault`."""
+    def __init__(self, vault: Vault, commands: Collection[Union[dict, "Command"]]=None):
+        """
+        Create a new set of commands available in the `vault`.
+
+        If no `commands` are provided, they will be listed from Obsidian on first use.
+        """
         self.vault = vault
-        commands = self.vault("command", "list")
-        as_list = [command if isinstance(command, Command) else Command(vault, **command) for command in commands]
-        self.data = {command.id: command for command in as_list}
+        self._command_names = None
+        self._attributes = None
+        self._commands = WeakValueDictionary()
+        if commands is not None:
+            self._set_commands(commands)
+
+    def _set_commands(self, commands):
+        """Store the command IDs and names and index them by attribute name."""
+        self._command_names = {}
+        self._attributes = {}
+        for command in commands:
+            if isinstance(command, Command):
+                self._commands[command.id] = command
+                id, name = command.id, command.name
+            else:
+                id, name = command["id"], command["name"]
+            self._command_names[id] = name
+            self._attributes[id.translate(_COMMAND_ATTRIBUTE_TABLE)] = id
+
+    def _ensure_populated(self, ):
+        """List the commands from Obsidian if this has not been done yet."""
+        if self._command_names is None:
+            self._set_commands(self.vault._list("commands"))
 
-        self._attributes = {command.id.replace(":", "_").replace("-", "_"): command for command in as_list}
+    @property
+    def data(self, ):
+        """Dictionary of all commands by ID."""
+        return {id: self[id] for id in self}
+
+    def copy(self, ):
+        """Return a copy of the collection, sharing the same `Command` objects."""
+        new = Commands(self.vault)
+        if self._command_names is not None:
+            new._command_names = dict(self._command_names)
+            new._attributes = dict(self._attributes)
+            new._commands.update(self._commands)
+        return new
+
+    __copy__ = copy
+
+    def __len__(self, ):
+        """Return number of commands."""
+        self._ensure_populated()
+        return len(self._command_names)
+
+    def __iter__(self, ):
+        """Iterate over the command IDs."""
+        self._ensure_populated()
+        return iter(self._command_names)
+
+    def __contains__(self, id):
+        """Check whether there is a command with given `id`."""
+        self._ensure_populated()
+        return id in self._command_names
+
+    def __getitem__(self, id: str) -> "Command":
+        """Get the command with given `id`."""
+        self._ensure_populated()
+        command = self._commands.get(id)
+        if command is None:
+            command = self._commands[id] = Command(self.vault, id, self._command_names[id])
+        return command
+
+    def get(self, id: str, default=None):
+        """Get the command with given `id` or `default` if there is no such command."""
+        self._ensure_populated()
+        if id not in self._command_names:
+            return default
+        return self[id]
+
+    def __setitem__(self, id: str, command: "Command"):
+        """Add `command` to the collection as `id`."""
+        self._ensure_populated()
+        self._command_names[id] = command.name
+        self._attributes[id.translate(_COMMAND_ATTRIBUTE_TABLE)] = id
+        self._commands[id] = command
+
+    def __delitem__(self, id: str):
+        """Remove the command with given `id` from the collection."""
+        self._ensure_populated()
+        del self._command_names[id]
+        self._attributes.pop(id.translate(_COMMAND_ATTRIBUTE_TABLE), None)
+        self._commands.pop(id, None)
 
     def __dir__(self, ):
         """Allow tags to ge accessed using autocomplete."""
+        self._ensure_populated()
         return ["data", "update"] + list(self._attributes.keys())
 
     def __getattr__(self, name: str):
         """Get a specific tag."""
-        if name in self._attributes.keys():
-            return self._attributes[name]
-        raise AttributeError(f"Command with id {name} is not used in this vault.")
+        if name.startswith("_"):
+            raise AttributeError(name)
+        self._ensure_populated()
+        id = self._attributes.get(name)
+        if id is None:
+            raise AttributeError(f"Command with id {name} is not used in this vault.")
+        return self[id]
 
 
 class Command:
     """Command available in Obsidian."""
 
+    __slots__ = ("vault", "id", "name", "__weakref__")
+
     def __init__(self, vault: Vault, id: str, name: str):
         """Create a new command representation with given `id` and `name`."""
         self.vault = vault
@@ -491,48 +1247,111 @@ class Command:
 class DataviewQuery:
     """Represents a Dataview query for the Obsidian vault."""
 
+    __slots__ = ("vault", "fields", "from_statement", "statements", "_rendered")
+
     def __init__(self, vault: Vault, from_statement: str, *statements: str, fields=None) -> None:
         """Create a dataview query of the vault consisting of the given statements."""
         self.vault = vault
         self.fields = fields
         self.from_statement = from_statement
         self.statements = statements
+        self._rendered = self._render()
 
     @property
     def type(self, ):
         """Return the query type based on whether `fields` are set."""
         return "LIST" if self.fields is None else "TABLE"
 
-    def __repr__(self, ):
-        """Get string representation of the Dataview query."""
+    def _render(self, ):
+        """Render the Dataview query as a string."""
         if self.type == "TABLE":
             field_str = ", ".join(self.fields)
             first_line = f"TABLE {field_str}"
         else:
             first_line = self.type
-        return "\n".join([first_line, self.from_statement] + list(self.statements))
+        return "\n".join([first_line, self.from_statement, *self.statements])
+
+    def __repr__(self, ):
+        """Get string representation of the Dataview query."""
+        return self._rendered
+
+    def __eq__(self, other):
+        """Check whether two queries are identical."""
+        if not isinstance(other, DataviewQuery):
+            return NotImplemented
+        return self.vault is other.vault and self._rendered == other._rendered
+
+    def __hash__(self, ):
+        """Hash the query based on its string representation."""
+        return hash(self._rendered)
 
     def __call__(self, ):
         """Run the query and return the result."""
-        result = self.vault("dataview", self.type.lower() + "-query", dql=str(self))
+        result = self.vault("dataview", self.type.lower() + "-query", dql=self._rendered)
         if self.type == "LIST":
-            filenames = [link[2:].split("|")[0] for link in result]
-            return Notes(self.vault, filenames)
+            return Notes(self.vault, self._filenames(result))
         else:
             return result
 
+    def _filenames(self, result):
+        """Extract the note file names from the links returned by a LIST query."""
+        return [link[2:].split("|")[0] for link in result]
+
+    async def aiter(self, limit=16):
+        """
+        Run the LIST query asynchronously and iterate over the resulting notes.
+
+        The attributes of all resulting notes are loaded concurrently in the background
+        (at most `limit` at a time), while the notes are yielded in order as soon as they are loaded:
+
+            async for note in query.aiter():
+                print(note.content)
+        """
+        if self.type != "LIST":
+            raise ValueError(f"Only LIST queries can be iterated over, not {self.type} queries.")
+        vault = self.vault
+        result = await vault._run_async(("dataview", "list-query"), {"dql": self._rendered})
+        notes = [Note(vault, filename) for filename in self._filenames(result)]
+        semaphore = asyncio.Semaphore(limit)
+
+        async def load(note):
+            async with semaphore:
+                note._reply = await vault._run_async(("note", "get"), {"file": note._file})
+            return note
+
+        tasks = [asyncio.create_task(load(note)) for note in notes]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _extend(self, statements, rendered: str):
+        """Create a copy of this query with new `statements`, which have already been `rendered`."""
+        query = DataviewQuery.__new__(DataviewQuery)
+        query.vault = self.vault
+        query.fields = self.fields
+        query.from_statement = self.from_statement
+        query.statements = statements
+        query._rendered = rendered
+        return query
+
+    def _add_statement(self, statement: str):
+        """Create a copy of this query with `statement` added at the end."""
+        return self._extend(self.statements + (statement, ), self._rendered + "\n" + statement)
+
     def where(self, clause: str):
         """Filter pages based on fields."""
-        return DataviewQuery(self.vault, self.from_statement, *self.statements, "WHERE " + clause, fields=self.fields)
+        return self._add_statement("WHERE " + clause)
 
     def sort(self, field: str, ascending=False):
         """Sort results by a field."""
         cmd = field + " " + ("ASCENDING" if ascending else "DESCENDING")
         if len(self.statements) > 0 and self.statements[-1].startswith("SORT "):
             statements = self.statements[:-1] + (self.statements[-1] + ", " + cmd, )
-        else:
-            statements = self.statements + ("SORT " + cmd, )
-        return DataviewQuery(self.vault, self.from_statement, *statements, fields=self.fields)
+            return self._extend(statements, self._rendered + ", " + cmd)
+        return self._add_statement("SORT " + cmd)
 
     def group_by(self, field: str, new_name=None):
         """Group results on a field."""
@@ -540,7 +1359,7 @@ class DataviewQuery:
             cmd = "GROUP BY " + field
         else:
             cmd = "GROUP BY " + field + " AS " + new_name
-        return DataviewQuery(self.vault, self.from_statement, *self.statements, cmd, fields=self.fields)
+        return self._add_statement(cmd)
 
     def flatten(self, field: str, new_name=None):
         """Flatten an array in every row yielding one resutl row per entry in the array."""
@@ -548,8 +1367,8 @@ class DataviewQuery:
             cmd = "FLATTEN " + field
         else:
             cmd = "FLATTEN " + field + " AS " + new_name
-        return DataviewQuery(self.vault, self.from_statement, *self.statements, cmd, fields=self.fields)
+        return self._add_statement(cmd)
 
     def limit(self, number: int):
         """Restrict the results to at most `number` values."""
-        return DataviewQuery(self.vault, self.from_statement, *self.statements, "LIMIT " + str(number), fields=self.fields)
+        return self._add_statement("LIMIT " + str(number))
@@ -4,12 +4,22 @@ Interface with the `xcall` application from https://github.com/martinfinke/xcall
 `xcall` allows for translating the callbacks from the x-callback-url protocol to stdout/stderr.
 This protocol is used to get replies from https://github.com/czottmann/obsidian-actions-uri.
 """
-import json
 import os
 import os.path as op
+import queue
+import select
 import shutil
-from subprocess import run
-from urllib.parse import quote
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from subprocess import PIPE, Popen, TimeoutExpired, run
+from urllib.parse import quote, urlencode
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 
 def xcall_binary() -> str:
@@ -17,9 +27,25 @@ def xcall_binary() -> str:
     Find the `xcall` binary.
 
     In order the following are checked:
+    - `$OBSIDIAN_ACTIONS_XCALL` environment variable.
     - `xcall` binary in PATH.
     - `/Applications/xcall.app/Contents/MacOS/xcall`
     - `$HOME/Applications/xcall.app/Contents/MacOS/xcall`
+
+    Apart from the environment variable, the result is cached for the rest of the python session.
+    """
+    path = os.environ.get("OBSIDIAN_ACTIONS_XCALL")
+    if path is not None:
+        return path
+    return _find_xcall_binary()
+
+
+@lru_cache(maxsize=1)
+def _find_xcall_binary() -> str:
+    """
+    Find the `xcall` binary in the default locations.
+
+    See :func:`xcall_binary` for the locations checked.
     """
     path = shutil.which("xcall")
     if path is not None:
@@ -37,24 +63,16 @@ def xcall_binary() -> str:
     raise FileNotFoundError("Did not find the `xcall` binary. Has `xcall.app` been installed from https://github.com/martinfinke/xcall.")
 
 
-def update_key(key, value):
-    """
-    Update python keyword argument name to URL key->value pair.
-
-    Replaces "_" with "-" in `key`.
-    Replace python True/False in `value` with true/false strings.
-    Quote any reserved characters in the `value`.
-    """
-    new_key = key.replace("-", "_")
-    new_value = str(value).lower() if isinstance(value, bool) else value
-    return new_key + "=" + quote(new_value)
-
 def build_url(app_name: str, *actions: str, **keywords: str) -> str:
     """
     Build the URL used to call a specific application.
 
     The resulting URL will look something like:
-    `app_name://action/action/action?key=value?key=value`
+    `app_name://action/action/action?key=value&key=value`
+
+    Any "_" in the keyword names are replaced with "-".
+    Python True/False values are replaced with true/false strings and None values are skipped.
+    Any reserved characters in the values are quoted.
     """
     short_app_name = app_name.removesuffix(".app")
     if len(actions) == 0:
@@ -63,13 +81,25 @@ def build_url(app_name: str, *actions: str, **keywords: str) -> str:
         return short_app_name
 
     action_string = "/".join([quote(a) for a in actions])
-    keyword_string = "&".join(update_key(key, value) for (key, value) in keywords.items())
-    if len(keywords) > 0:
-        keyword_string = "?" + keyword_string
+    query = build_query(keywords)
+    keyword_string = "?" + query if len(query) > 0 else ""
 
     return f"{short_app_name}://{action_string}{keyword_string}"
 
 
+def build_query(keywords: dict) -> str:
+    """
+    Build the query string (without leading "?") from the `keywords`.
+
+    The keywords are processed as described in :func:`build_url`.
+    """
+    items = [
+        (key.replace("_", "-"), str(value).lower() if isinstance(value, bool) else value)
+        for key, value in keywords.items() if value is not None
+    ]
+    return urlencode(items, safe="/", quote_via=quote)
+
+
 def xcall_raw(app_name: str, *actions: str, **keywords: str) -> str:
     """
     Call an application using the `x-callback-url` protocol.
@@ -80,45 +110,88 @@ def xcall_raw(app_name: str, *actions: str, **keywords: str) -> str:
 
     The URL can be defined based on the `app_name` and `actions`/`keywords`
     as described in :func:`build_url` or by supplying the URL directly as a string.
+
+    Calls are run through a single :class:`XCallSession` shared by the python session.
+    """
+    return _default_session.xcall_raw(app_name, *actions, **keywords)
+
+
+def _run_once(url: str, timeout=30) -> bytes:
+    """Call `url` in a new `xcall` process, returning the undecoded reply."""
+    proc = run([xcall_binary(), "-url", url], capture_output=True, timeout=timeout)
+    return _check_reply(url, proc.stdout, proc.stderr)
+
+
+def get_url(app_name: str, *actions: str, **keywords: str) -> str:
+    """
+    Get the URL to call.
+
+    Either build it from `app_name`, `actions`, and `keywords` using :func:`build_url`
+    or return `app_name` if it is already a full URL.
     """
-    binary = xcall_binary()
     if ":/" in app_name:
         if len(actions) > 0 or len(keywords) > 0:
             raise ValueError(f"Cannot set actions/keywords when supplying the full URL {app_name}")
-        url = app_name
-    else:
-        url = build_url(app_name, *actions, **keywords)
+        return app_name
+    return build_url(app_name, *actions, **keywords)
 
-    proc = run([binary, "-url", url], capture_output=True, timeout=30)
-    if len(proc.stderr) > 0:
-        err = try_json_parse(proc.stderr.decode())
+
+def _check_reply(url: str, stdout: bytes, stderr: bytes) -> bytes:
+    """
+    Process the reply from the `xcall` binary after calling `url`.
+
+    Raises a `ChildProcessError` if there is an `x-error` reply on `stderr`.
+    Otherwise, `stdout` is returned undecoded.
+    """
+    if len(stderr) > 0:
+        err = try_json_parse(stderr)
         raise ChildProcessError(f"{url} returned an error message: {err['errorMessage']}")
-    return proc.stdout.decode()
+    return stdout
+
+
+def _loads_if_json(input_string: str):
+    """Parse `input_string` if it looks like a JSON list or object, otherwise return it unchanged."""
+    if input_string.lstrip()[:1] not in ("[", "{"):
+        return input_string
+    try:
+        return _json_loads(input_string)
+    except ValueError:
+        return input_string
 
 
 def try_json_parse(input_string: str):
     """
     Try parsing the input string if it looks like a JSON.
 
+    Any strings within the resulting list or object that look like a JSON are parsed as well.
     Otherwise, the input string is returned.
+    The input can also be UTF-8 encoded bytes, which are passed to the JSON parser without decoding.
+    If these do not contain a JSON, they are returned decoded as a string.
     """
-    if not isinstance(input_string, str):
-        return input_string
-    stripped = input_string.strip()
-    if len(stripped) == 0:
-        return input_string
-    if stripped[0] == "[" and stripped[-1] == "]":
+    if isinstance(input_string, bytes):
+        if input_string.lstrip()[:1] not in (b"[", b"{"):
+            return input_string.decode()
         try:
-            as_list = json.loads(input_string)
-        except json.JSONDecodeError:
+            parsed = _json_loads(input_string)
+        except ValueError:
+            return input_string.decode()
+    elif isinstance(input_string, str):
+        parsed = _loads_if_json(input_string)
+        if parsed is input_string:
             return input_string
-        return [try_json_parse(elem) for elem in as_list]
-    if stripped[0] == "{" and stripped[-1] == "}":
-        return {
-            key: try_json_parse(value)
-            for key, value in json.loads(input_string).items()
-        }
-    return input_string
+    else:
+        return input_string
+    to_walk = [parsed]
+    while to_walk:
+        container = to_walk.pop()
+        items = container.items() if isinstance(container, dict) else enumerate(container)
+        for key, value in items:
+            if isinstance(value, str):
+                new_value = _loads_if_json(value)
+                if new_value is not value:
+                    container[key] = new_value
+                    to_walk.append(new_value)
+    return parsed
 
 
 def xcall(app_name: str, *actions: str, **keywords: str) -> str:
@@ -132,4 +205,178 @@ def xcall(app_name: str, *actions: str, **keywords: str) -> str:
     The URL can be defined based on the `app_name` and `actions`/`keywords`
     as described in :func:`build_url` or by supplying the URL directly as a string.
     """
-    return try_json_parse(xcall_raw(app_name, *actions, **keywords))
+    return _default_session.xcall(app_name, *actions, **keywords)
+
+
+_SESSION_SCRIPT = r"""
+err=$(mktemp) || exit 1
+trap 'rm -f "$err"' EXIT
+while IFS= read -r url; do
+    "$1" -url "$url" 2>"$err" </dev/null
+    printf '\036'
+    cat "$err"
+    printf '\036'
+done
+"""
+
+
+class XCallSession:
+    """
+    Long-running helper process that calls `xcall` for every URL it receives.
+
+    `xcall` can only handle a single URL per process.
+    Rather than starting a new process from python for every call,
+    the URLs are written to a single shell process, which runs `xcall` for each of them.
+    Each reply is the `xcall` stdout and stderr, both terminated by an ASCII record separator,
+    which never appears unescaped in the JSON replies.
+
+    The helper process is started on the first call and stops when the session is closed.
+    If the helper process cannot be started or has stopped before receiving the URL,
+    `xcall` is called directly instead.
+    """
+
+    def __init__(self, timeout=30):
+        """Prepare a new session. Each call will time out after `timeout` seconds."""
+        self.timeout = timeout
+        self._proc = None
+        self._lock = threading.Lock()
+
+    def _start(self, ):
+        """Start the helper process."""
+        self._proc = Popen(
+            ["/bin/sh", "-c", _SESSION_SCRIPT, "sh", xcall_binary()],
+            stdin=PIPE, stdout=PIPE, bufsize=0,
+        )
+
+    def _read_reply(self, url: str):
+        """Read stdout and stderr of a single `xcall` run from the helper process."""
+        fd = self._proc.stdout.fileno()
+        deadline = time.monotonic() + self.timeout
+        chunks = []
+        n_separators = 0
+        while n_separators < 2:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                self.close()
+                raise TimeoutExpired(url, self.timeout)
+            chunk = os.read(fd, 65536)
+            if len(chunk) == 0:
+                self.close()
+                raise ChildProcessError(f"xcall helper process stopped unexpectedly while calling {url}")
+            chunks.append(chunk)
+            n_separators += chunk.count(b"\x1e")
+        stdout, stderr, _ = b"".join(chunks).split(b"\x1e")
+        return stdout, stderr
+
+    def xcall_raw(self, app_name: str, *actions: str, **keywords: str) -> str:
+        """
+        Call an application using the `x-callback-url` protocol within this session.
+
+        See :func:`xcall_raw` for details.
+        """
+        return self._xcall_raw_bytes(app_name, *actions, **keywords).decode()
+
+    def _xcall_raw_bytes(self, app_name: str, *actions: str, **keywords: str) -> bytes:
+        """Call an application within this session, returning the undecoded reply."""
+        url = get_url(app_name, *actions, **keywords)
+        with self._lock:
+            try:
+                if self._proc is None or self._proc.poll() is not None:
+                    self._start()
+                self._proc.stdin.write(url.encode() + b"\n")
+            except (BrokenPipeError, PermissionError, FileNotFoundError):
+                self.close()
+                return _run_once(url, self.timeout)
+            stdout, stderr = self._read_reply(url)
+        return _check_reply(url, stdout, stderr)
+
+    def xcall(self, app_name: str, *actions: str, **keywords: str):
+        """
+        Call an application using the `x-callback-url` protocol within this session.
+
+        See :func:`xcall` for details.
+        """
+        return try_json_parse(self._xcall_raw_bytes(app_name, *actions, **keywords))
+
+    def close(self, ):
+        """Stop the helper process."""
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        proc.stdin.close()
+        try:
+            proc.wait(timeout=1)
+        except TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+
+    def __del__(self, ):
+        """Stop the helper process when the session is garbage collected."""
+        self.close()
+
+
+_default_session = XCallSession()
+
+
+class XCallPool:
+    """
+    Pool of :class:`XCallSession` helper processes running submitted calls concurrently.
+
+    Calls are put on a submission queue and picked up by up to `size` worker threads,
+    each owning its own session.
+    A new worker is only started when all existing workers are busy.
+    Workers stop after being idle for `idle_timeout` seconds.
+    """
+
+    def __init__(self, size=4, timeout=30, idle_timeout=60):
+        """Create a pool of at most `size` helper processes."""
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._n_workers = 0
+        self._n_idle = 0
+
+    def submit(self, app_name: str, *actions: str, **keywords: str) -> Future:
+        """
+        Submit a call using the `x-callback-url` protocol (see :func:`xcall`).
+
+        Returns a `concurrent.futures.Future`, which will contain the parsed reply.
+        """
+        future = Future()
+        self._queue.put((app_name, actions, keywords, future))
+        with self._lock:
+            if self._queue.qsize() > self._n_idle and self._n_workers < self.size:
+                self._n_workers += 1
+                threading.Thread(target=self._work, daemon=True).start()
+        return future
+
+    def _work(self, ):
+        """Run submitted calls in a single session until idle for too long."""
+        session = XCallSession(timeout=self.timeout)
+        try:
+            while True:
+                with self._lock:
+                    self._n_idle += 1
+                try:
+                    item = self._queue.get(timeout=self.idle_timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._n_idle -= 1
+                        if self._queue.empty():
+                            self._n_workers -= 1
+                            return
+                    continue
+                with self._lock:
+                    self._n_idle -= 1
+                app_name, actions, keywords, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(session.xcall(app_name, *actions, **keywords))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            session.close()
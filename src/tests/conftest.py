@@ -0,0 +1,15 @@
+"""Shared fixtures replacing the `xcall` binary by stub scripts."""
+import pytest
+
+
+@pytest.fixture
+def install_xcall(tmp_path, monkeypatch):
+    """Return a function that installs `script` as the `xcall` binary within `tmp_path`."""
+    def install(script: str) -> str:
+        path = tmp_path / "xcall"
+        path.write_text(script)
+        path.chmod(0o755)
+        monkeypatch.setenv("OBSIDIAN_ACTIONS_XCALL", str(path))
+        return str(path)
+
+    return install
@@ -0,0 +1,362 @@
+"""Tests for the vault interface, using a stub binary that mimics the Obsidian actions."""
+import asyncio
+import json
+import sys
+from concurrent.futures import Future
+
+import pytest
+
+from obsidian_actions.cache import VaultCache
+from obsidian_actions.obsidian import AsyncVault, Command, DataviewQuery, Note, Vault
+
+_STUB_OBSIDIAN = r"""#!{python}
+import json
+import os
+import sys
+from urllib.parse import parse_qs, urlparse
+
+here = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(here, "calls.log"), "a") as f:
+    f.write(sys.argv[2] + "\n")
+url = urlparse(sys.argv[2])
+action = url.path.strip("/")
+query = {key: value[0] for key, value in parse_qs(url.query, keep_blank_values=True).items()}
+state_file = os.path.join(here, "notes.json")
+with open(state_file) as f:
+    notes = json.load(f)
+original = dict(notes)
+
+
+def fail(message):
+    sys.stderr.write(json.dumps({"errorCode": 404, "errorMessage": message}))
+    sys.exit(0)
+
+
+def path(name):
+    return name if name.endswith(".md") else name + ".md"
+
+
+def note_reply(filepath):
+    if filepath not in notes:
+        fail("Note couldn't be found")
+    return {
+        "result-filepath": filepath,
+        "result-content": notes[filepath],
+        "result-body": notes[filepath],
+        "result-front-matter": "",
+        "result-properties": "{}",
+    }
+
+
+if action in ("note/list", "file/list"):
+    reply = {"result-list": json.dumps(sorted(notes))}
+elif action == "tags/list":
+    reply = {"result-list": json.dumps(["#foo-bar", "#x/y"])}
+elif action == "command/list":
+    reply = {"result-list": json.dumps([
+        {"id": "daily-notes", "name": "Open today's daily note"},
+        {"id": "app:go-back", "name": "Navigate back"},
+    ])}
+elif action == "command/execute":
+    if query["commands"] == "daily-notes":
+        notes.setdefault("daily.md", "")
+    reply = {"result-message": "executed"}
+elif action == "daily-note/get-current":
+    reply = note_reply("daily.md")
+elif action == "note/get":
+    reply = note_reply(path(query["file"]))
+elif action == "note/create":
+    filepath = path(query["file"])
+    if filepath not in notes or query["if-exists"] == "overwrite":
+        notes[filepath] = query.get("content", "")
+    reply = note_reply(filepath)
+elif action == "note/append":
+    filepath = path(query["file"])
+    note_reply(filepath)
+    notes[filepath] += query["content"]
+    reply = {"result-message": "appended"}
+elif action == "file/rename":
+    notes[query["new-filename"]] = notes.pop(query["file"])
+    reply = {"result-message": "renamed"}
+elif action == "file/delete":
+    del notes[query["file"]]
+    reply = {"result-message": "deleted"}
+elif action == "dataview/list-query":
+    reply = {"result-data": json.dumps(["[[" + p + "|" + p[:-3] + "]]" for p in sorted(notes)])}
+elif action == "info":
+    reply = {"result-version": "1", "result-vault": query["vault"]}
+else:
+    fail("Unknown action " + action)
+
+if notes != original:
+    with open(state_file, "w") as f:
+        json.dump(notes, f)
+print(json.dumps(reply))
+"""
+
+
+@pytest.fixture
+def stub_xcall(install_xcall, tmp_path, monkeypatch):
+    """
+    Point `xcall_binary` at a stub that mimics Obsidian with notes "a.md" and "b/c.md".
+
+    Returns a function listing the actions called so far.
+    """
+    (tmp_path / "notes.json").write_text(json.dumps({"a.md": "old content", "b/c.md": "nested"}))
+    install_xcall(_STUB_OBSIDIAN.replace("{python}", sys.executable))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+    def calls():
+        log = tmp_path / "calls.log"
+        if not log.exists():
+            return []
+        return [line.split("?")[0].removeprefix("obsidian://actions-uri/") for line in log.read_text().splitlines()]
+
+    return calls
+
+
+def test_listing_is_lazy(stub_xcall):
+    """Notes, commands, and tags are only listed on first use."""
+    vault = Vault("test")
+    assert repr(vault.notes) == "Notes(not listed yet)"
+    assert stub_xcall() == []
+    assert list(vault.notes) == ["a", "b/c"]
+    assert vault.commands.daily_notes.id == "daily-notes"
+    assert repr(vault.tags.x__y) == "#x/y"
+    assert stub_xcall() == ["note/list", "command/list", "tags/list"]
+
+
+def test_note_attributes_loaded_once(stub_xcall):
+    """All attributes of a note are loaded with a single action and kept with the note."""
+    vault = Vault("test")
+    assert vault.notes["a"].content == "old content"
+    assert vault.notes["a"].body == "old content"
+    assert vault.notes["a"].properties == {}
+    assert vault.notes["a"].filepath == "a.md"
+    assert stub_xcall() == ["note/get"]
+
+
+def test_note_registry(stub_xcall):
+    """Notes are shared within a vault, but not between vaults."""
+    vault = Vault("test")
+    note = vault.notes["a"]
+    assert Note(vault, "a.md") is note
+    assert Note(Vault("test"), "a") is not note
+
+
+def test_batch(stub_xcall):
+    """Actions within a batch return futures and are run on exit."""
+    vault = Vault("test")
+    with vault.batch() as results:
+        listed = vault.file_list()
+        info = vault.info()
+        assert isinstance(listed, Future)
+        assert stub_xcall() == []
+    assert results == [["a.md", "b/c.md"], {"version": "1", "vault": "test"}]
+    assert info.result() == results[1]
+
+
+def test_batch_error(stub_xcall):
+    """The first error within a batch is raised once all actions have run."""
+    vault = Vault("test")
+    with pytest.raises(ChildProcessError, match="Note couldn't be found"):
+        with vault.batch():
+            vault("note", "get", file="missing")
+            listed = vault.file_list()
+    assert listed.done()
+    assert listed.result() == ["a.md", "b/c.md"]
+
+
+def test_notes_load(stub_xcall):
+    """All notes can be loaded together."""
+    vault = Vault("test")
+    notes = vault.notes.load()
+    assert [note.content for note in notes] == ["old content", "nested"]
+    assert sorted(stub_xcall()) == ["note/get", "note/get", "note/list"]
+
+
+def test_aborted_batch(stub_xcall):
+    """A note load cancelled by an aborted batch is run again on the next access."""
+    vault = Vault("test")
+    note = vault.notes["a"]
+    with pytest.raises(KeyError):
+        with vault.batch():
+            note.load()
+            raise KeyError("abort")
+    assert note.content == "old content"
+
+
+def test_failed_batch_load(stub_xcall):
+    """A note load that failed within a batch is retried on the next access."""
+    vault = Vault("test")
+    note = vault.notes["missing"]
+    with pytest.raises(ChildProcessError):
+        with vault.batch():
+            note.load()
+    with pytest.raises(ChildProcessError):
+        assert note.content
+    vault.note_create("missing", content="created")
+    assert note.content == "created"
+
+
+def test_reply_cache(stub_xcall):
+    """Replies to read-only actions are reused until the vault is modified."""
+    vault = Vault("test", reply_cache_ttl=60)
+    listed = vault.file_list()
+    listed.append("changed.md")
+    assert vault.file_list() == ["a.md", "b/c.md"]
+    assert stub_xcall() == ["file/list"]
+    vault.file_delete("a.md")
+    assert vault.file_list() == ["b/c.md"]
+    assert stub_xcall() == ["file/list", "file/delete", "file/list"]
+
+
+def test_vault_cache(tmp_path):
+    """Lists are stored on disk until they expire or are cleared."""
+    cache = VaultCache("test", ttl=60, path=str(tmp_path / "test.db"))
+    assert cache.load("notes") is None
+    cache.store("notes", ["a.md"])
+    assert VaultCache("test", ttl=60, path=cache.path).load("notes") == ["a.md"]
+    cache.ttl = -1
+    assert cache.load("notes") is None
+    cache.ttl = 60
+    cache.clear()
+    assert cache.load("notes") is None
+
+
+def test_disk_cache(stub_xcall):
+    """Note lists are reused between vaults until a vault is modified."""
+    assert list(Vault("test", cache_ttl=60).notes) == ["a", "b/c"]
+    vault = Vault("test", cache_ttl=60)
+    assert list(vault.notes) == ["a", "b/c"]
+    assert stub_xcall() == ["note/list"]
+    vault.file_delete("a.md")
+    assert list(Vault("test", cache_ttl=60).notes) == ["b/c"]
+
+
+def test_periodic_note(stub_xcall):
+    """Missing periodic notes are created once and the cached note list is updated."""
+    vault = Vault("test", cache_ttl=60)
+    assert list(vault.notes) == ["a", "b/c"]
+    note = vault.daily_note()
+    assert note.filepath == "daily.md"
+    assert vault.daily_note() is note
+    assert stub_xcall() == [
+        "note/list", "daily-note/get-current", "command/list", "command/execute", "daily-note/get-current",
+    ]
+    assert "daily" in Vault("test", cache_ttl=60).notes
+
+
+def test_commands(stub_xcall):
+    """Commands can be added, removed, and copied."""
+    commands = Vault("test").commands
+    command = Command(commands.vault, "my-plugin:run", "Run")
+    commands["my-plugin:run"] = command
+    assert commands.my_plugin_run is command
+    del commands["daily-notes"]
+    assert "daily-notes" not in commands
+    assert not hasattr(commands, "daily_notes")
+    assert commands.pop("app:go-back").name == "Navigate back"
+    copied = commands.copy()
+    assert copied["my-plugin:run"] is command
+    del copied["my-plugin:run"]
+    assert list(commands) == ["my-plugin:run"]
+    assert len(copied) == 0
+
+
+def test_notes_copy(stub_xcall):
+    """Copies of the notes share the `Note` objects."""
+    notes = Vault("test").notes
+    copied = notes.copy()
+    assert copied["a"] is notes["a"]
+    del copied["a"]
+    assert list(notes) == ["a", "b/c"]
+    assert list(copied) == ["b/c"]
+
+
+def test_dataview_query(stub_xcall):
+    """Dataview queries are rendered incrementally, merging consecutive sorts."""
+    vault = Vault("test")
+    query = vault.dataview_query(vault.tags.foo_bar, fields=["file.name", "x"])
+    query = query.where("x > 1").sort("y").sort("z", ascending=True).limit(3)
+    assert repr(query) == "TABLE file.name, x\nFROM #foo-bar\nWHERE x > 1\nSORT y DESCENDING, z ASCENDING\nLIMIT 3"
+    expected = DataviewQuery(
+        vault, "FROM #foo-bar", "WHERE x > 1", "SORT y DESCENDING, z ASCENDING", "LIMIT 3", fields=["file.name", "x"],
+    )
+    assert query == expected
+    assert hash(query) == hash(expected)
+
+
+def test_dataview_list_query(stub_xcall):
+    """LIST queries return the matching notes, which can also be iterated over asynchronously."""
+    vault = Vault("test")
+    query = vault.dataview_query(vault.tags.foo_bar)
+    assert repr(query) == "LIST\nFROM #foo-bar"
+    assert list(query()) == ["a", "b/c"]
+
+    async def iterate():
+        return [note async for note in query.aiter()]
+
+    notes = asyncio.run(iterate())
+    assert [note.content for note in notes] == ["old content", "nested"]
+    assert all(note.vault is vault for note in notes)
+
+
+def test_async_vault(stub_xcall):
+    """Asynchronous actions share the state of the synchronous vault and invalidate its caches."""
+    async_vault = AsyncVault("test", reply_cache_ttl=60)
+    assert async_vault.sync.file_list() == ["a.md", "b/c.md"]
+
+    async def run():
+        await async_vault.prefetch()
+        await async_vault.file_rename("a.md", "d.md")
+        return await async_vault.gather(async_vault.note_get("d"), async_vault.info())
+
+    note, info = asyncio.run(run())
+    assert note.content == "old content"
+    assert info == {"version": "1", "vault": "test"}
+    assert list(async_vault.notes) == ["a", "b/c"]
+    assert async_vault.sync.file_list() == ["b/c.md", "d.md"]
+    async_vault.refresh_cache()
+    assert list(async_vault.notes) == ["b/c", "d"]
+
+
+def test_note_create_overwrite(stub_xcall):
+    """Overwriting a note updates the attributes of the note already in use."""
+    vault = Vault("test")
+    note = vault.notes["a"]
+    assert note.content == "old content"
+    created = vault.note_create("a", content="NEW", overwrite=True)
+    assert created is note
+    assert note.content == "NEW"
+    assert stub_xcall() == ["note/get", "note/create"]
+
+    async_vault = AsyncVault("test")
+    async_note = async_vault.notes["a"]
+    assert async_note.content == "NEW"
+    created = asyncio.run(async_vault.note_create("a", content="NEWER", overwrite=True))
+    assert created is async_note
+    assert async_note.content == "NEWER"
+
+
+def test_file_changes_drop_loaded_notes(stub_xcall):
+    """Renaming or deleting a file drops the loaded attributes of the affected notes."""
+    vault = Vault("test")
+    renamed, nested = vault.notes["a"], vault.notes["b/c"]
+    assert renamed.content == "old content"
+    assert nested.content == "nested"
+    vault.file_rename("a.md", "d.md")
+    with pytest.raises(ChildProcessError):
+        assert renamed.content
+    assert vault.notes["d"].content == "old content"
+    vault.note_create("a", content="recreated")
+    vault.file_delete("b/c.md")
+    with pytest.raises(ChildProcessError):
+        assert nested.content
+
+    async_vault = AsyncVault("test")
+    note = async_vault.notes["a"]
+    assert note.content == "recreated"
+    asyncio.run(async_vault.file_delete("a.md"))
+    with pytest.raises(ChildProcessError):
+        assert note.content
@@ -0,0 +1,107 @@
+"""Tests for the `xcall` interface, using a stub binary instead of `xcall.app`."""
+import pytest
+
+from obsidian_actions.xcall import (
+    XCallPool,
+    XCallSession,
+    build_url,
+    get_url,
+    try_json_parse,
+    xcall_binary,
+)
+
+_STUB_XCALL = r"""#!/bin/sh
+url="$2"
+case "$url" in
+    *fail*) printf '{"errorCode": 400, "errorMessage": "it failed"}' >&2 ;;
+    *big*) head -c 200000 /dev/zero | tr '\0' 'a' ;;
+    *) printf '{"url": "%s", "helper": "%s", "text": "line1\\nline2"}\n' "$url" "$PPID" ;;
+esac
+"""
+
+
+@pytest.fixture
+def stub_xcall(install_xcall):
+    """Point `xcall_binary` at a stub that echoes the URL it is called with."""
+    return install_xcall(_STUB_XCALL)
+
+
+def test_try_json_parse_nested():
+    """Strings within the reply that look like JSON are parsed as well."""
+    reply = '{"result-list": "[\\"a.md\\", \\"{\\\\\\"x\\\\\\": 1}\\"]", "result-name": "plain"}'
+    assert try_json_parse(reply) == {"result-list": ["a.md", {"x": 1}], "result-name": "plain"}
+
+
+def test_try_json_parse_bytes():
+    """Bytes are parsed directly or returned decoded if they are not JSON."""
+    assert try_json_parse(b' {"a": "[1, 2]"}') == {"a": [1, 2]}
+    assert try_json_parse(b"plain text") == "plain text"
+    assert try_json_parse("{not json".encode()) == "{not json"
+
+
+def test_try_json_parse_invalid():
+    """Strings that only look like JSON are returned unchanged."""
+    assert try_json_parse("{not json") == "{not json"
+    assert try_json_parse('{"a": "[not json", "b": "text"}') == {"a": "[not json", "b": "text"}
+    assert try_json_parse("plain") == "plain"
+    assert try_json_parse(None) is None
+
+
+def test_build_url():
+    """Keywords are renamed, converted, and quoted."""
+    assert build_url("obsidian.app") == "obsidian"
+    assert build_url("obsidian", "actions-uri", "info") == "obsidian://actions-uri/info"
+    url = build_url(
+        "obsidian", "actions-uri", "note", "get",
+        vault="my vault", file="folder/a&b.md", new_filename=None, create_if_not_found=True, silent=False,
+    )
+    assert url == (
+        "obsidian://actions-uri/note/get?vault=my%20vault&file=folder/a%26b.md"
+        "&create-if-not-found=true&silent=false"
+    )
+    with pytest.raises(ValueError):
+        build_url("obsidian", vault="my vault")
+
+
+def test_get_url():
+    """Full URLs are passed on unchanged."""
+    assert get_url("obsidian://actions-uri/info") == "obsidian://actions-uri/info"
+    assert get_url("obsidian", "actions-uri", "info") == "obsidian://actions-uri/info"
+    with pytest.raises(ValueError):
+        get_url("obsidian://actions-uri", "info")
+
+
+def test_xcall_binary(stub_xcall):
+    """The environment variable overrides the search for `xcall`."""
+    assert xcall_binary() == stub_xcall
+
+
+def test_session(stub_xcall):
+    """All calls in a session are framed correctly and run by the same helper process."""
+    session = XCallSession(timeout=10)
+    try:
+        first = session.xcall("obsidian", "actions-uri", "info", vault="v")
+        assert first["url"] == "obsidian://actions-uri/info?vault=v"
+        assert first["text"] == "line1\nline2"
+        assert session.xcall_raw("obsidian://big") == "a" * 200000
+        with pytest.raises(ChildProcessError, match="it failed"):
+            session.xcall("obsidian://fail")
+        second = session.xcall("obsidian", "actions-uri", "note", "list", vault="v")
+        assert second["url"] == "obsidian://actions-uri/note/list?vault=v"
+        assert second["helper"] == first["helper"]
+    finally:
+        session.close()
+    assert session._proc is None
+
+
+def test_pool(stub_xcall):
+    """Submitted calls are run by at most `size` helper processes."""
+    pool = XCallPool(size=2, idle_timeout=1)
+    futures = [pool.submit("obsidian", "actions-uri", "note", "get", file=str(idx)) for idx in range(6)]
+    failed = pool.submit("obsidian://fail")
+    results = [future.result(timeout=10) for future in futures]
+    assert [r["url"] for r in results] == [
+        f"obsidian://actions-uri/note/get?file={idx}" for idx in range(6)
+    ]
+    assert len({r["helper"] for r in results}) <= 2
+    assert isinstance(failed.exception(timeout=10), ChildProcessError)